@@ -8,25 +8,28 @@ Exits with non-zero status if any required check fails.
 import os
 import sys
 import argparse
+import json
+import mmap
 import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
 from pathlib import Path
 from datetime import datetime
 
 # Optional imports
 try:
-    import nbformat
+    import orjson
 except Exception:
-    nbformat = None
-
-try:
-    import pandas as pd
-except Exception:
-    pd = None
+    orjson = None
 
 
 PASS = "PASS"
 FAIL = "FAIL"
 WARN = "WARN"
+# Every status in a result tuple is one of these objects, so summarize()
+# compares with ``is``; anything deserialized must be mapped back through here.
+_STATUSES = {s: s for s in (PASS, FAIL, WARN)}
 
 
 REQUIRED_FILES = [
@@ -39,7 +42,8 @@ REQUIRED_FILES = [
     ".gitignore",
 ]
 
-GITIGNORE_REQUIRED_PATTERNS = [
+# Regex patterns are compiled once here rather than on every cell/call.
+_GITIGNORE_RE = [re.compile(p, re.MULTILINE) for p in [
     r"\.ipynb_checkpoints/",
     r"venv/",
     r"__pycache__/",
@@ -47,7 +51,36 @@ GITIGNORE_REQUIRED_PATTERNS = [
     r"notebooks/03_.*",
     r"notebooks/04_.*",
     r"notebooks/05_.*",
-]
+]]
+
+# Notebook content hints as (literals, regexes), all matched case-insensitively.
+# Plain substrings go in the literal list and are checked with ``in``; only
+# patterns that really need the regex engine are compiled.
+_NB01_TEXT = (
+    ["Wine Classification", "Problem Framing"],
+    [re.compile(p, re.IGNORECASE) for p in [
+        r"UCI.*Wine Quality|Wine Quality.*UCI",
+        r"red\s*vs\.?\s*white|red.*white",
+        r"stakeholder|impact|ethic|sustainab",
+    ]],
+)
+
+_NB01_REPRO = (
+    ["__version__"],
+    [re.compile(r"random_state\s*=\s*42", re.IGNORECASE)],
+)
+
+_NB02_CODE = (
+    ["read_csv", "concat("],
+    [re.compile(p, re.IGNORECASE) for p in [r"sep\s*=\s*[\"']\;[\"']", r"(?:\['type'\]|type)\s*="]],
+)
+
+_NB02_VIS = (
+    ["value_counts(", "countplot", "plot(", "hist("],
+    [re.compile(r"barh?\(", re.IGNORECASE)],
+)
+
+_FIT_RE = re.compile(r"\.fit\s*\(")
 
 REQUIREMENTS_MIN = {"pandas", "numpy", "scikit-learn", "matplotlib", "seaborn"}
 
@@ -58,7 +91,9 @@ SKLEARN_CLASS_NAMES = [
     "MultinomialNB", "LinearSVC", "LinearDiscriminantAnalysis", "QuadraticDiscriminantAnalysis"
 ]
 
-def load_text(path: Path) -> str:
+@lru_cache(maxsize=32)
+def _load_text_cached(path_str: str) -> str:
+    path = Path(path_str)
     try:
         return path.read_text(encoding="utf-8")
     except Exception:
@@ -67,11 +102,35 @@ def load_text(path: Path) -> str:
         except Exception:
             return ""
 
+def load_text(path: Path) -> str:
+    # Memoized per run (keyed by str, which hashes cheaper than Path) so
+    # checks can re-read small files like .gitignore without extra I/O.
+    return _load_text_cached(str(path))
+
+def _present_paths(root: Path, rels):
+    """Relative paths under root that exist, with one scandir per parent directory.
+
+    Like Path.exists(), symlinks are followed, so a dangling link is not present.
+    """
+    wanted = set(rels)
+    present = set()
+    for parent in {rel.rpartition("/")[0] for rel in rels}:
+        prefix = f"{parent}/" if parent else ""
+        try:
+            with os.scandir(root / parent) as it:
+                for entry in it:
+                    rel = prefix + entry.name
+                    if rel in wanted and (entry.is_file() or entry.is_dir()):
+                        present.add(rel)
+        except OSError:
+            pass
+    return present
+
 def check_files_exist(root: Path):
     results = []
+    present = _present_paths(root, REQUIRED_FILES)
     for rel in REQUIRED_FILES:
-        p = root / rel
-        ok = p.exists()
+        ok = rel in present
         results.append((f"Exists: {rel}", PASS if ok else FAIL, "" if ok else f"Missing {rel}"))
     return results
 
@@ -80,7 +139,7 @@ def check_gitignore(root: Path):
     if not p.exists():
         return [("gitignore present & includes rules", FAIL, ".gitignore not found")]
     text = load_text(p)
-    missing = [pat for pat in GITIGNORE_REQUIRED_PATTERNS if re.search(pat, text, re.MULTILINE) is None]
+    missing = [pat.pattern for pat in _GITIGNORE_RE if pat.search(text) is None]
     if missing:
         return [("gitignore includes today-only rules", WARN, f"Add patterns: {', '.join(missing)}")]
     return [("gitignore includes today-only rules", PASS, "")]
@@ -96,104 +155,191 @@ def check_requirements(root: Path):
         return [("requirements includes minimal deps", WARN, f"Missing: {', '.join(sorted(missing))}")]
     return [("requirements includes minimal deps", PASS, "")]
 
+_IMAGE_MIME_MARKER = b'"image/'
+_IMAGE_MIMES = frozenset({"image/png", "image/jpeg", "image/svg+xml"})
+
+def _read_bytes_mmap(path: Path):
+    with path.open("rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
 def load_notebook(path: Path):
-    if nbformat is None:
-        return None, "nbformat not installed (pip install nbformat)"
+    """Return (nb, err, may_have_images).
+
+    Plain JSON is enough here: only cell_type/source/outputs are read, so
+    nbformat's schema validation and NotebookNode wrapping are skipped. The
+    file is memory-mapped so orjson can parse straight from the page cache,
+    and a raw byte search tells the caller whether any image MIME key can
+    exist before we bother counting image outputs.
+    """
     try:
-        nb = nbformat.read(path, as_version=4)
-        return nb, ""
+        with _read_bytes_mmap(path) as mm:
+            may_have_images = mm.find(_IMAGE_MIME_MARKER) != -1
+            if orjson is not None:
+                with memoryview(mm) as view:
+                    nb = orjson.loads(view)
+            else:
+                nb = json.loads(mm[:])
+        if not isinstance(nb, dict):
+            return None, "not a notebook (top-level JSON is not an object)", False
+        return nb, "", may_have_images
     except Exception as e:
-        return None, str(e)
-
-def nb_all_cells(nb):
-    for cell in nb.cells:
-        yield cell
-
-def nb_markdown_cells(nb):
-    for cell in nb.cells:
-        if cell.get("cell_type") == "markdown":
-            yield cell
-
-def nb_code_cells(nb):
-    for cell in nb.cells:
-        if cell.get("cell_type") == "code":
-            yield cell
-
-def has_outputs(nb):
-    for cell in nb_code_cells(nb):
-        outs = cell.get("outputs") or []
-        if len(outs) > 0:
-            return True
-    return False
-
-def count_image_outputs(nb):
-    cnt = 0
-    for cell in nb_code_cells(nb):
-        for out in cell.get("outputs") or []:
-            data = out.get("data") or {}
-            if "image/png" in data or "image/jpeg" in data or "image/svg+xml" in data:
-                cnt += 1
-    return cnt
-
-def find_strings_in_nb(nb, patterns, search_in=("markdown","code")):
-    found = set()
-    for cell in nb_all_cells(nb):
+        return None, str(e), False
+
+def cell_source(cell):
+    # On-disk notebooks usually store source as a list of lines.
+    src = cell.get("source") or ""
+    return "".join(src) if isinstance(src, list) else src
+
+def _scan_nb(nb, count_images=True):
+    """Collect everything the notebook checks need in a single pass over the cells."""
+    scan = {
+        "code_sources": [],
+        "md_sources": [],
+        "image_output_count": 0,
+        "has_any_output": False,
+    }
+    for cell in nb.get("cells") or []:
         ct = cell.get("cell_type")
-        if ct not in search_in:
-            continue
-        src = cell.get("source") or ""
-        for pat in patterns:
-            if re.search(pat, src, re.IGNORECASE):
-                found.add(pat)
+        if ct == "markdown":
+            scan["md_sources"].append(cell_source(cell))
+        elif ct == "code":
+            scan["code_sources"].append(cell_source(cell))
+            outs = cell.get("outputs") or []
+            if outs:
+                scan["has_any_output"] = True
+            if not count_images:
+                continue
+            for out in outs:
+                if (out.get("data") or {}).keys() & _IMAGE_MIMES:
+                    scan["image_output_count"] += 1
+    scan["combined_code_text"] = "\n".join(scan["code_sources"])
+    return scan
+
+def pattern_names(patterns):
+    """Display names of a (literals, regexes) table, in table order."""
+    literals, regexes = patterns
+    return list(literals) + [pat.pattern for pat in regexes]
+
+def find_strings_in_nb(scan, patterns, search_in=("markdown","code")):
+    literals, regexes = patterns
+    literals = [(lit.lower(), lit) for lit in literals]
+    sources = []
+    if "markdown" in search_in:
+        sources += scan["md_sources"]
+    if "code" in search_in:
+        sources += scan["code_sources"]
+    found = set()
+    # Only patterns not yet found are tried against the next cell.
+    for src in sources:
+        if literals:
+            src_lower = src.lower()
+            hits = [item for item in literals if item[0] in src_lower]
+            if hits:
+                found.update(lit for _, lit in hits)
+                literals = [item for item in literals if item not in hits]
+        if regexes:
+            hits = [pat for pat in regexes if pat.search(src)]
+            if hits:
+                found.update(pat.pattern for pat in hits)
+                regexes = [pat for pat in regexes if pat not in hits]
+        if not literals and not regexes:
+            break
     return found
 
+_CACHE_DIR = Path(".qa_cache")
+
+def _cache_stamp(path: Path):
+    # The script's own mtime is part of the stamp so editing the checks
+    # invalidates old results as well.
+    st = path.stat()
+    return [st.st_mtime_ns, st.st_size, Path(__file__).stat().st_mtime_ns]
+
+def _write_cache_file(cache_file: Path, payload):
+    cache_dir = cache_file.parent
+    if not cache_dir.is_dir():
+        cache_dir.mkdir(exist_ok=True)
+        # Keep the cache out of `git status` in whatever project is checked.
+        (cache_dir / ".gitignore").write_text("*\n", encoding="utf-8")
+    # Write to a temp file and rename so concurrent runs never see a torn file.
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp, cache_file)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def cached_nb_check(rel):
+    """Memoize a notebook check on disk, keyed by the notebook's mtime and size.
+
+    There is one cache file per notebook; a stale entry is overwritten.
+    """
+    def decorator(check):
+        @wraps(check)
+        def wrapper(root: Path):
+            try:
+                stamp = _cache_stamp(root / rel)
+            except OSError:
+                return check(root)
+            cache_file = root / _CACHE_DIR / f"{Path(rel).name}.json"
+            try:
+                cached = json.loads(cache_file.read_bytes())
+                if cached["stamp"] == stamp:
+                    return [(label, _STATUSES[status], detail)
+                            for label, status, detail in cached["results"]]
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+            results = check(root)
+            try:
+                _write_cache_file(cache_file, {"stamp": stamp, "results": results})
+            except OSError:
+                pass
+            return results
+        return wrapper
+    return decorator
+
+@cached_nb_check("notebooks/01_problem_framing.ipynb")
 def check_nb01(root: Path):
     path = root / "notebooks/01_problem_framing.ipynb"
-    nb, err = load_notebook(path)
+    nb, err, _ = load_notebook(path)
     if nb is None:
         return [("Notebook 01 loads", FAIL, f"Cannot open: {err}")]
+    scan = _scan_nb(nb, count_images=False)
     results = [("Notebook 01 loads", PASS, "")]
-    must_text = [
-        r"Wine Classification",
-        r"Problem Framing",
-        r"UCI.*Wine Quality|Wine Quality.*UCI",
-        r"red\s*vs\.?\s*white|red.*white",
-        r"stakeholder|impact|ethic|sustainab",
-    ]
-    found = find_strings_in_nb(nb, must_text, search_in=("markdown","code"))
-    missing = [m for m in must_text if m not in found]
+    found = find_strings_in_nb(scan, _NB01_TEXT, search_in=("markdown","code"))
+    missing = [m for m in pattern_names(_NB01_TEXT) if m not in found]
     if missing:
         results.append(("NB01: Problem framing content present", WARN, f"Consider adding: {missing}"))
     else:
         results.append(("NB01: Problem framing content present", PASS, ""))
-    repro_hints = [r"__version__", r"random_state\s*=\s*42"]
-    found2 = find_strings_in_nb(nb, repro_hints, search_in=("code",))
+    found2 = find_strings_in_nb(scan, _NB01_REPRO, search_in=("code",))
     if not found2:
         results.append(("NB01: Repro cell (versions/seed)", WARN, "Add a cell that prints pandas/sklearn versions and sets random_state=42 where relevant."))
     else:
         results.append(("NB01: Repro cell (versions/seed)", PASS, ""))
-    if has_outputs(nb):
+    if scan["has_any_output"]:
         results.append(("NB01: Saved with outputs", PASS, ""))
     else:
         results.append(("NB01: Saved with outputs", WARN, "Execute and save so GitHub renders outputs."))
     return results
 
+@cached_nb_check("notebooks/02_data_understanding.ipynb")
 def check_nb02(root: Path):
     path = root / "notebooks/02_data_understanding.ipynb"
-    nb, err = load_notebook(path)
+    nb, err, may_have_images = load_notebook(path)
     if nb is None:
         return [("Notebook 02 loads", FAIL, f"Cannot open: {err}")]
+    scan = _scan_nb(nb, count_images=may_have_images)
     results = [("Notebook 02 loads", PASS, "")]
-    must_code = [r"read_csv", r"sep\s*=\s*[\"']\;[\"']", r"(?:\['type'\]|type)\s*=", r"concat\("]
-    found_code = find_strings_in_nb(nb, must_code, search_in=("code",))
-    missing = [m for m in must_code if m not in found_code]
+    found_code = find_strings_in_nb(scan, _NB02_CODE, search_in=("code",))
+    missing = [m for m in pattern_names(_NB02_CODE) if m not in found_code]
     if missing:
         results.append(("NB02: Data load + label (0/1) + concat", WARN, f"Missing patterns: {missing}"))
     else:
         results.append(("NB02: Data load + label (0/1) + concat", PASS, ""))
-    class_vis_hints = [r"value_counts\(", r"countplot", r"barh?\(", r"plot\(", r"hist\("]
-    found_vis = find_strings_in_nb(nb, class_vis_hints, search_in=("code",))
-    img_count = count_image_outputs(nb)
+    found_vis = find_strings_in_nb(scan, _NB02_VIS, search_in=("code",))
+    img_count = scan["image_output_count"]
     if not found_vis or img_count < 1:
         results.append(("NB02: Class balance figure + output", WARN, "Add a bar/plot of class counts and ensure outputs are saved."))
     else:
@@ -204,23 +350,23 @@ def check_nb02(root: Path):
         results.append(("NB02: >=2 feature visuals present", WARN, "Add at least two feature plots (e.g., boxplots/hist by class)."))
     interp_markdowns = 0
     # Check markdown cells
-    for cell in nb_markdown_cells(nb):
-        text = (cell.get("source") or "").lower()
+    for text in scan["md_sources"]:
+        text = text.lower()
         if any(w in text for w in ["interpretation", "insight", "insights"]):
             if len(text.split()) >= 20:
                 interp_markdowns += 1
     # Also check code cells for print statements with interpretations
-    for cell in nb_code_cells(nb):
-        src = (cell.get("source") or "").lower()
+    for src in scan["code_sources"]:
+        src = src.lower()
         if any(w in src for w in ["interpretation", "insight", "insights"]):
             interp_markdowns += 1
     if interp_markdowns >= 2:
         results.append(("NB02: Figure interpretations present", PASS, f"{interp_markdowns} interpretation notes found."))
     else:
         results.append(("NB02: Figure interpretations present", WARN, "Add 2–3 line interpretations under figures (use the word 'Interpretation' to pass this check)."))
-    code_text = "\n".join([cell.get("source") or "" for cell in nb_code_cells(nb)])
+    code_text = scan["combined_code_text"]
     trained = False
-    if re.search(r"\.fit\s*\(", code_text):
+    if _FIT_RE.search(code_text):
         trained = True
     for name in SKLEARN_CLASS_NAMES:
         if name in code_text:
@@ -230,47 +376,53 @@ def check_nb02(root: Path):
         results.append(("NB02: No model training appears", FAIL, "Detected model training patterns ('.fit(' or classifier names). Move training to Notebook 03."))
     else:
         results.append(("NB02: No model training appears", PASS, ""))
-    if has_outputs(nb):
+    if scan["has_any_output"]:
         results.append(("NB02: Saved with outputs", PASS, ""))
     else:
         results.append(("NB02: Saved with outputs", FAIL, "Run all cells and save notebook with outputs so GitHub renders figures."))
     return results
 
+def csv_shape(path: Path, sep: bytes = b";"):
+    """Return (rows, cols) of a delimited file without parsing any values."""
+    with path.open("rb") as f:
+        header = f.readline()
+        n_cols = header.count(sep) + 1
+        n_rows = sum(1 for line in f if line.strip())
+    return n_rows, n_cols
+
 def check_data_shapes(root: Path):
-    if pd is None:
-        return [("Data shapes (red/white)", WARN, "pandas not available; cannot verify shapes")]
     results = []
     red_p = root / "data/winequality-red.csv"
     white_p = root / "data/winequality-white.csv"
     try:
-        red = pd.read_csv(red_p, sep=";")
-        white = pd.read_csv(white_p, sep=";")
-        ok_red = (1500 <= len(red) <= 1700) and (11 <= red.shape[1] <= 13)
-        ok_white = (4700 <= len(white) <= 5100) and (11 <= white.shape[1] <= 13)
+        red = csv_shape(red_p)
+        white = csv_shape(white_p)
+        ok_red = (1500 <= red[0] <= 1700) and (11 <= red[1] <= 13)
+        ok_white = (4700 <= white[0] <= 5100) and (11 <= white[1] <= 13)
         status = PASS if (ok_red and ok_white) else WARN
-        msg = f"red={red.shape}, white={white.shape}"
+        msg = f"red={red}, white={white}"
         results.append(("Data shapes (approx UCI)", status, msg))
     except Exception as e:
         results.append(("Data shapes (approx UCI)", FAIL, f"Error reading CSVs: {e}"))
     return results
 
 def summarize(results):
-    max_label = max(len(r[0]) for r in results)
-    max_status = max(len(r[1]) for r in results)
-    lines = []
+    max_label = max_status = 0
     failures = 0
     warnings = 0
-    for label, status, detail in results:
-        if status == FAIL:
+    for label, status, _ in results:
+        max_label = max(max_label, len(label))
+        max_status = max(max_status, len(status))
+        if status is FAIL:
             failures += 1
-        elif status == WARN:
+        elif status is WARN:
             warnings += 1
-        lines.append(f"{label.ljust(max_label)}  {status.ljust(max_status)}  {detail}")
     header = f"QA Report — {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-    sep = "-" * len(header)
-    body = "\n".join(lines)
-    footer = f"\nSummary: {failures} FAIL, {warnings} WARN\n"
-    return f"{header}\n{sep}\n{body}{footer}", failures
+    fmt = f"{{:<{max_label}}}  {{:<{max_status}}}  {{}}"
+    lines = [header, "-" * len(header)]
+    lines.extend(fmt.format(*r) for r in results)
+    lines.append(f"Summary: {failures} FAIL, {warnings} WARN\n")
+    return "\n".join(lines), failures
 
 def main():
     ap = argparse.ArgumentParser()
@@ -278,13 +430,15 @@ def main():
     args = ap.parse_args()
     root = Path(args.root).resolve()
 
+    # The check groups touch different files, so run them concurrently and
+    # collect results in the original order.
+    checks = [check_files_exist, check_gitignore, check_requirements,
+              check_nb01, check_nb02, check_data_shapes]
     results = []
-    results += check_files_exist(root)
-    results += check_gitignore(root)
-    results += check_requirements(root)
-    results += check_nb01(root)
-    results += check_nb02(root)
-    results += check_data_shapes(root)
+    with ThreadPoolExecutor(max_workers=len(checks)) as ex:
+        futs = [ex.submit(check, root) for check in checks]
+        for f in futs:
+            results += f.result()
 
     report, failures = summarize(results)
     print(report)